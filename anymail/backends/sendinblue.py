@@ -1,3 +1,5 @@
+from math import isfinite
+
 from requests.structures import CaseInsensitiveDict
 
 from ..exceptions import AnymailRequestsAPIError
@@ -5,6 +7,12 @@ from ..message import AnymailRecipientStatus
 from ..utils import BASIC_NUMERIC_TYPES, get_anymail_setting
 from .base_requests import AnymailRequestsBackend, RequestsPayload
 
+try:
+    # Optional: faster json serialization (for large batch sends), if available
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class EmailBackend(AnymailRequestsBackend):
     """
@@ -43,25 +51,26 @@ class EmailBackend(AnymailRequestsBackend):
 
         if response.content != b"":
             parsed_response = self.deserialize_json_response(response, payload, message)
-            try:
+            if not isinstance(parsed_response, dict):
+                parsed_response = {}
+            if "messageId" in parsed_response:
                 message_id = parsed_response["messageId"]
-            except (KeyError, TypeError):
-                try:
-                    # batch send
-                    message_ids = parsed_response["messageIds"]
-                except (KeyError, TypeError) as err:
-                    raise AnymailRequestsAPIError(
-                        "Invalid SendinBlue API response format",
-                        email_message=message,
-                        payload=payload,
-                        response=response,
-                        backend=self,
-                    ) from err
+            elif "messageIds" in parsed_response:
+                # batch send
+                message_ids = parsed_response["messageIds"]
+            else:
+                raise AnymailRequestsAPIError(
+                    "Invalid SendinBlue API response format",
+                    email_message=message,
+                    payload=payload,
+                    response=response,
+                    backend=self,
+                )
 
         status = AnymailRecipientStatus(message_id=message_id, status="queued")
-        recipient_status = {
-            recipient.addr_spec: status for recipient in payload.all_recipients
-        }
+        recipient_status = dict.fromkeys(
+            (recipient.addr_spec for recipient in payload.all_recipients), status
+        )
         if message_ids:
             for to, message_id in zip(payload.to_recipients, message_ids):
                 recipient_status[to.addr_spec] = AnymailRecipientStatus(
@@ -94,29 +103,90 @@ class SendinBluePayload(RequestsPayload):
 
     def serialize_data(self):
         """Performs any necessary serialization on self.data, and returns the result."""
+        # Work on a (shallow) copy, so serialize_data doesn't modify self.data
+        # and can safely be called more than once
+        data = dict(self.data)
+        headers = data.get("headers")
+        if not headers:
+            data.pop("headers", None)  # don't send empty headers
+        elif isinstance(headers, CaseInsensitiveDict):
+            data["headers"] = dict(headers)  # plain dict for is_orjson_safe
         if self.is_batch():
             # Burst data["to"] into data["messageVersions"]
-            to_list = self.data.pop("to", [])
-            self.data["messageVersions"] = [
-                {"to": [to], "params": self.merge_data.get(to["email"])}
-                for to in to_list
+            to_list = data.pop("to", [])
+            get_merge_data = self.merge_data.get
+            data["messageVersions"] = [
+                {"to": [to], "params": get_merge_data(to["email"])} for to in to_list
             ]
             if self.merge_metadata:
                 # Merge global metadata with any per-recipient metadata.
                 # (Top-level X-Mailin-custom header is already set to global metadata,
                 # and will apply for recipients without a "headers" override.)
-                for version in self.data["messageVersions"]:
+                # Recipients often share identical merge_metadata, so reuse
+                # the serialized header where possible.
+                serialized_metadata = {}  # metadata_cache_key: json
+                metadata = self.metadata
+                merge_metadata = self.merge_metadata
+                for version in data["messageVersions"]:
                     to_email = version["to"][0]["email"]
-                    if to_email in self.merge_metadata:
-                        recipient_metadata = self.metadata.copy()
-                        recipient_metadata.update(self.merge_metadata[to_email])
-                        version["headers"] = {
-                            "X-Mailin-custom": self.serialize_json(recipient_metadata)
-                        }
+                    if to_email in merge_metadata:
+                        recipient_metadata = merge_metadata[to_email]
+                        cache_key = self.metadata_cache_key(recipient_metadata)
+                        custom = serialized_metadata.get(cache_key)
+                        if custom is None:
+                            custom = self.serialize_json(
+                                {**metadata, **recipient_metadata}
+                            )
+                            if cache_key is not None:
+                                serialized_metadata[cache_key] = custom
+                        version["headers"] = {"X-Mailin-custom": custom}
+
+        # Post orjson's utf-8 bytes as-is (Content-Type is already application/json),
+        # rather than decoding to str just for requests to re-encode it.
+        serialized = self.serialize_json_bytes(data)
+        if serialized is not None:
+            return serialized
+        return self.serialize_json(data)
 
-        if not self.data["headers"]:
-            del self.data["headers"]  # don't send empty headers
-        return self.serialize_json(self.data)
+    @staticmethod
+    def metadata_cache_key(metadata):
+        """Returns a hashable key for metadata dict, or None if it shouldn't be cached
+
+        Only metadata with str keys and simple str, int, bool or None values
+        is cached. Other keys and values can compare equal but serialize
+        differently (e.g., 0.0 and -0.0, (1, 2) and (True, 2), or keys
+        1 and True).
+        """
+        cache_key_type = (str, int, bool, type(None))
+        if all(
+            type(key) is str and type(value) in cache_key_type
+            for key, value in metadata.items()
+        ):
+            # (Include type, so that e.g., 1 and True aren't treated as equivalent.
+            # Use a tuple, not frozenset, so key order matches the serialized json.)
+            return tuple((key, type(value), value) for key, value in metadata.items())
+        return None
+
+    def serialize_json_bytes(self, data):
+        """Returns data serialized to utf-8 encoded json by orjson, or None.
+
+        Returns None if orjson isn't installed, or if orjson might not handle data
+        the same way json.dumps would (in which case the caller should fall back
+        to serialize_json).
+
+        Use only for the request body: unlike json.dumps, orjson doesn't
+        escape non-ascii characters, so its output isn't suitable for
+        header values like X-Mailin-custom.
+        """
+        if orjson is not None and is_orjson_safe(data):
+            try:
+                return orjson.dumps(data)
+            except TypeError:
+                # (orjson.JSONEncodeError is a TypeError.) Fall back to json.dumps,
+                # which allows a few things orjson doesn't (e.g., non-str dict keys,
+                # very large ints).
+                pass
+        return None
 
     #
     # Payload construction
@@ -125,11 +195,9 @@ class SendinBluePayload(RequestsPayload):
     @staticmethod
     def email_object(email):
         """Converts EmailAddress to SendinBlue API array"""
-        email_object = dict()
-        email_object["email"] = email.addr_spec
         if email.display_name:
-            email_object["name"] = email.display_name
-        return email_object
+            return {"email": email.addr_spec, "name": email.display_name}
+        return {"email": email.addr_spec}
 
     def set_from_email(self, email):
         self.data["sender"] = self.email_object(email)
@@ -156,12 +224,13 @@ class SendinBluePayload(RequestsPayload):
     def set_extra_headers(self, headers):
         # SendinBlue requires header values to be strings (not integers) as of 11/2022.
         # Stringify ints and floats; anything else is the caller's responsibility.
-        self.data["headers"].update(
-            {
-                k: str(v) if isinstance(v, BASIC_NUMERIC_TYPES) else v
+        numeric_types = BASIC_NUMERIC_TYPES
+        if any(isinstance(v, numeric_types) for v in headers.values()):
+            headers = {
+                k: str(v) if isinstance(v, numeric_types) else v
                 for k, v in headers.items()
             }
-        )
+        self.data["headers"].update(headers)
 
     def set_tags(self, tags):
         if len(tags) > 0:
@@ -213,8 +282,34 @@ class SendinBluePayload(RequestsPayload):
         self.merge_metadata = merge_metadata
 
     def set_send_at(self, send_at):
-        try:
-            start_time_iso = send_at.isoformat(timespec="milliseconds")
-        except (AttributeError, TypeError):
-            start_time_iso = send_at  # assume user already formatted
+        start_time_iso = send_at  # assume user already formatted
+        if hasattr(send_at, "isoformat"):
+            try:
+                start_time_iso = send_at.isoformat(timespec="milliseconds")
+            except TypeError:
+                pass  # isoformat() without timespec param
         self.data["scheduledAt"] = start_time_iso
+
+
+def is_orjson_safe(data):
+    """Return True if orjson will serialize data equivalently to json.dumps
+
+    orjson natively serializes some types that json.dumps rejects (e.g., UUID,
+    Enum, dataclasses) and silently converts NaN and infinity to null, so only
+    plain dicts, lists and tuples of str, int, bool, None and finite floats
+    are considered safe. (Subclasses of these types are not.)
+    """
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        value_type = type(value)
+        if value_type is dict:
+            pending.extend(value.values())
+        elif value_type is list or value_type is tuple:
+            pending.extend(value)
+        elif value_type is float:
+            if not isfinite(value):
+                return False
+        elif value is not None and value_type not in (str, int, bool):
+            return False
+    return True
@@ -1,9 +1,13 @@
 import json
+import unittest
 from base64 import b64decode, b64encode
+from dataclasses import dataclass
 from datetime import date, datetime, timezone
 from decimal import Decimal
 from email.mime.base import MIMEBase
 from email.mime.image import MIMEImage
+from enum import Enum
+from uuid import UUID
 
 from django.core import mail
 from django.test import SimpleTestCase, override_settings, tag
@@ -31,6 +35,14 @@ from .utils import (
     sample_image_path,
 )
 
+# These tests are run both with and without 'orjson' installed.
+try:
+    import orjson  # noqa: F401
+except ImportError:
+    ORJSON_INSTALLED = False
+else:
+    ORJSON_INSTALLED = True
+
 
 @tag("sendinblue")
 @override_settings(
@@ -372,6 +384,15 @@ class SendinBlueBackendStandardEmailTests(SendinBlueBackendMockAPITestCase):
         with self.assertRaises(AnymailAPIError):
             self.message.send()
 
+    def test_invalid_success_response(self):
+        for raw in [b'{"unexpected": "format"}', b'["unexpected", "format"]']:
+            with self.subTest(raw=raw):
+                self.set_mock_response(raw=raw)
+                with self.assertRaisesMessage(
+                    AnymailAPIError, "Invalid SendinBlue API response format"
+                ):
+                    self.message.send()
+
 
 @tag("sendinblue")
 class SendinBlueBackendAnymailFeatureTests(SendinBlueBackendMockAPITestCase):
@@ -394,6 +415,22 @@ class SendinBlueBackendAnymailFeatureTests(SendinBlueBackendMockAPITestCase):
         self.assertEqual(metadata["items"], 6)
         self.assertEqual(metadata["float"], 98.6)
 
+    def test_metadata_overrides_extra_header(self):
+        # metadata replaces any X-Mailin-custom extra header, regardless of case
+        self.message.extra_headers = {"x-mailin-custom": '{"old": 1}'}
+        self.message.metadata = {"new": 2}
+        self.message.send()
+        data = self.get_api_call_json()
+        self.assertEqual(data["headers"], {"X-Mailin-custom": '{"new": 2}'})
+
+    def test_metadata_non_ascii(self):
+        # X-Mailin-custom header value should be ascii-only json
+        # (whether or not orjson is used for the request body)
+        self.message.metadata = {"name": "Fête"}
+        self.message.send()
+        data = self.get_api_call_json()
+        self.assertEqual(data["headers"]["X-Mailin-custom"], '{"name": "F\\u00eate"}')
+
     def test_send_at(self):
         utc_plus_6 = get_fixed_timezone(6 * 60)
         utc_minus_8 = get_fixed_timezone(-8 * 60)
@@ -438,6 +475,20 @@ class SendinBlueBackendAnymailFeatureTests(SendinBlueBackendMockAPITestCase):
             data = self.get_api_call_json()
             self.assertEqual(data["scheduledAt"], "2022-10-13T18:02:00.123-11:30")
 
+    def test_send_at_datetime_like(self):
+        # Objects with a datetime-compatible isoformat (e.g., arrow.Arrow)
+        # don't need to subclass datetime
+        class DatetimeLike:
+            def isoformat(self, sep="T", timespec="auto"):
+                return datetime(
+                    2022, 10, 11, 12, 13, 14, tzinfo=timezone.utc
+                ).isoformat(sep, timespec)
+
+        self.message.send_at = DatetimeLike()
+        self.message.send()
+        data = self.get_api_call_json()
+        self.assertEqual(data["scheduledAt"], "2022-10-11T12:13:14.000+00:00")
+
     def test_tag(self):
         self.message.tags = ["receipt", "multiple"]
         self.message.send()
@@ -571,6 +622,63 @@ class SendinBlueBackendAnymailFeatureTests(SendinBlueBackendMockAPITestCase):
             {"notification_batch": "zx912"},
         )
 
+    def test_merge_metadata_shared(self):
+        # Recipients with identical merge_metadata, or with values
+        # that compare equal but serialize differently
+        self.set_mock_response(json_data=self._mock_batch_response)
+        merge_metadata = {
+            "a@example.com": {"vip": True},
+            "b@example.com": {"vip": True},
+            "c@example.com": {"vip": 1},
+            "d@example.com": {"ids": (1, 2)},
+            "e@example.com": {"ids": (True, 2)},
+            "f@example.com": {"x": 0.0},
+            "g@example.com": {"x": -0.0},
+            "h@example.com": {"vip": True, "groups": ["x", "y"]},
+            "i@example.com": {"vip": True, "groups": ["x", "y"]},
+            "j@example.com": {1: "x"},
+            "k@example.com": {True: "x"},
+        }
+        self.message.to = list(merge_metadata.keys())
+        self.message.merge_metadata = merge_metadata
+        self.message.send()
+
+        data = self.get_api_call_json()
+        # (json.loads would treat 1 and True as equal, so check the raw json)
+        custom = {
+            version["to"][0]["email"]: version["headers"]["X-Mailin-custom"]
+            for version in data["messageVersions"]
+        }
+        self.assertEqual(
+            custom,
+            {
+                "a@example.com": '{"vip": true}',
+                "b@example.com": '{"vip": true}',
+                "c@example.com": '{"vip": 1}',
+                "d@example.com": '{"ids": [1, 2]}',
+                "e@example.com": '{"ids": [true, 2]}',
+                "f@example.com": '{"x": 0.0}',
+                "g@example.com": '{"x": -0.0}',
+                "h@example.com": '{"vip": true, "groups": ["x", "y"]}',
+                "i@example.com": '{"vip": true, "groups": ["x", "y"]}',
+                "j@example.com": '{"1": "x"}',
+                "k@example.com": '{"true": "x"}',
+            },
+        )
+
+    def test_serialize_data_idempotent(self):
+        self.message.to = ["alice@example.com", "bob@example.com"]
+        self.message.merge_data = {"alice@example.com": {"name": "Alice"}}
+        self.message.merge_metadata = {"bob@example.com": {"order_id": 678}}
+        connection = mail.get_connection()
+        payload = connection.build_message_payload(
+            self.message, connection.send_defaults
+        )
+        first = payload.serialize_data()
+        self.assertEqual(payload.serialize_data(), first)
+        self.assertEqual(len(json.loads(first)["messageVersions"]), 2)
+        self.assertNotIn("messageVersions", payload.data)
+
     def test_default_omits_options(self):
         """Make sure by default we don't send any ESP-specific options.
 
@@ -656,6 +764,60 @@ class SendinBlueBackendAnymailFeatureTests(SendinBlueBackendMockAPITestCase):
         # original message
         self.assertRegex(str(err), r"Decimal.*is not JSON serializable")
 
+    def test_non_ascii_body(self):
+        self.message.subject = "Fête 🎉"
+        self.message.send()
+        data = self.get_api_call_data()
+        # Must be utf-8 bytes (from orjson) or ascii-only str (from json.dumps),
+        # not a str that requests would have to guess how to encode:
+        if isinstance(data, str):
+            self.assertTrue(data.isascii())
+        self.assertEqual(json.loads(data)["subject"], "Fête 🎉")
+
+    @unittest.skipUnless(ORJSON_INSTALLED, "Install 'orjson' to test orjson encoding")
+    def test_orjson_body(self):
+        # When orjson is installed, it should be used to encode (plain) payloads
+        self.message.send()
+        data = self.get_api_call_data()
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(json.loads(data)["subject"], "Subject")
+
+    def test_json_serialization_compatibility(self):
+        # Serialization should accept (and reject) the same data as json.dumps,
+        # whether or not the optional (faster) orjson package is in use
+        self.message.esp_extra = {"params": {1: "non-str key", "big": 2**70}}
+        self.message.send()
+        data = self.get_api_call_json()
+        self.assertEqual(data["params"], {"1": "non-str key", "big": 2**70})
+
+        self.message.esp_extra = {"params": {"nan": float("nan"), "inf": float("inf")}}
+        self.message.send()
+        data = self.get_api_call_data()
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        self.assertIn('"nan": NaN', data)
+        self.assertIn('"inf": Infinity', data)
+
+        class Color(Enum):
+            RED = "red"
+
+        @dataclass
+        class Point:
+            x: int
+
+        for value in [
+            datetime(2022, 10, 11),
+            UUID("12345678-1234-5678-1234-567812345678"),
+            Color.RED,
+            Point(1),
+        ]:
+            with self.subTest(value=value):
+                self.message.esp_extra = {"params": {"value": value}}
+                with self.assertRaisesMessage(
+                    AnymailSerializationError, type(value).__name__
+                ):
+                    self.message.send()
+
 
 @tag("sendinblue")
 class SendinBlueBackendRecipientsRefusedTests(SendinBlueBackendMockAPITestCase):